@@ -5,7 +5,7 @@ Ausbildungsnachweis PDF Generator (Form-Filling Version)
 Reads a YAML config and fills in a prepared AcroForm PDF template with named fields.
 
 Dependencies:
-  pip install pyyaml holidays python-dateutil pypdf
+  pip install pyyaml holidays pypdf
 
 Usage:
   # Generate example config
@@ -14,14 +14,21 @@ Usage:
   # Batch-create reports
   python main.py config.yaml
 """
+import io
 import sys
+import math
 import random
+import itertools
 import datetime
+from concurrent.futures import ProcessPoolExecutor
 import yaml
 import holidays
-from dateutil.relativedelta import relativedelta, MO
 from pypdf import PdfReader, PdfWriter
 
+# libyaml-backed loader/dumper when available (pip wheel or libyaml-dev)
+Loader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+Dumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
 # -----------------------------------------------------------------------------
 # 1) Example config generator
 # -----------------------------------------------------------------------------
@@ -54,22 +61,32 @@ def generate_example_config(path: str):
         ]
     }
     with open(path, 'w', encoding='utf-8') as f:
-        yaml.dump(example, f, sort_keys=False, allow_unicode=True)
+        yaml.dump(example, f, Dumper=Dumper, sort_keys=False, allow_unicode=True)
     print(f"📝 Example config written to {path}")
 
 # -----------------------------------------------------------------------------
 # 2) Config loader with Kranken priority
 # -----------------------------------------------------------------------------
+def _to_date(value) -> datetime.date:
+    # YAML already yields date objects for unquoted YYYY-MM-DD values
+    if isinstance(value, datetime.date):
+        return value
+    return datetime.date.fromisoformat(str(value))
+
 def load_config(path: str) -> dict:
     with open(path, 'r', encoding='utf-8') as f:
-        cfg = yaml.safe_load(f)
+        cfg = yaml.load(f, Loader=Loader)
     for key in ('template','name', 'start_date', 'end_date'):
         if key not in cfg:
             print(f"Missing config field: {key}")
             sys.exit(1)
-    cfg['start_date']    = datetime.datetime.strptime(cfg['start_date'], '%Y-%m-%d').date()
-    cfg['end_date']      = datetime.datetime.strptime(cfg['end_date'],   '%Y-%m-%d').date()
+    cfg['start_date']    = _to_date(cfg['start_date'])
+    cfg['end_date']      = _to_date(cfg['end_date'])
+    if cfg['end_date'] < cfg['start_date']:
+        print("Invalid config: end_date is before start_date")
+        sys.exit(1)
     cfg['default_hours'] = cfg.get('default_hours', 8)
+    cfg['seed']          = cfg.get('seed')
     # tasks per year
     tasks = {}
     for y in (1, 2, 3):
@@ -87,34 +104,34 @@ def load_config(path: str) -> dict:
         if label.lower() == 'krankheit':
             continue
         if 'date' in entry:
-            d = datetime.datetime.strptime(entry['date'], '%Y-%m-%d').date()
+            d = _to_date(entry['date'])
             spec[d] = label
         else:
-            s = datetime.datetime.strptime(entry['start'], '%Y-%m-%d').date()
-            e = datetime.datetime.strptime(entry.get('end', entry['start']), '%Y-%m-%d').date()
-            for i in range((e - s).days + 1):
-                spec[s + datetime.timedelta(days=i)] = label
+            s = _to_date(entry['start'])
+            e = _to_date(entry.get('end', entry['start']))
+            spec.update({datetime.date.fromordinal(o): label
+                         for o in range(s.toordinal(), e.toordinal() + 1)})
     # then Kranken override
     for entry in entries:
         label = entry['label']
         if label.lower() != 'krankheit':
             continue
         if 'date' in entry:
-            d = datetime.datetime.strptime(entry['date'], '%Y-%m-%d').date()
+            d = _to_date(entry['date'])
             spec[d] = label
         else:
-            s = datetime.datetime.strptime(entry['start'], '%Y-%m-%d').date()
-            e = datetime.datetime.strptime(entry.get('end', entry['start']), '%Y-%m-%d').date()
-            for i in range((e - s).days + 1):
-                spec[s + datetime.timedelta(days=i)] = label
+            s = _to_date(entry['start'])
+            e = _to_date(entry.get('end', entry['start']))
+            spec.update({datetime.date.fromordinal(o): label
+                         for o in range(s.toordinal(), e.toordinal() + 1)})
     cfg['special_days'] = spec
     return cfg
 
 # -----------------------------------------------------------------------------
 # 3) Form-filling helper
 # -----------------------------------------------------------------------------
-def fill_week_form(template_path: str, output_path: str, data: dict):
-    reader = PdfReader(template_path)
+def fill_week_form(reader: PdfReader, output_path: str, data: dict):
+    # reader is parsed once by the caller; each week still gets its own writer
     writer = PdfWriter()
     writer.clone_document_from_reader(reader)
     writer.update_page_form_field_values(writer.pages[0], data)
@@ -122,11 +139,41 @@ def fill_week_form(template_path: str, output_path: str, data: dict):
         writer.write(out)
     print(f"✔️ {output_path}")
 
+# template reader of the current worker process, set by _init_worker
+_READER = None
+
+def _init_worker(template_bytes: bytes):
+    global _READER
+    _READER = PdfReader(io.BytesIO(template_bytes))
+
+def _render_one(job: tuple):
+    output_path, data = job
+    fill_week_form(_READER, output_path, data)
+
 # -----------------------------------------------------------------------------
 # 4) Batch report generator
 # -----------------------------------------------------------------------------
+_DAYS = ('Montag', 'Dienstag', 'Mittwoch', 'Donnerstag', 'Freitag')
+# form field names per weekday: ((<Tag>_T1, <Tag>_T2, <Tag>_T3), <Tag>_Stunden)
+_DAY_FIELDS = tuple((tuple(f"{day}_T{j}" for j in range(1, 4)), f"{day}_Stunden")
+                    for day in _DAYS)
+
+# above this many ordered subsets, fall back to random.sample per day
+_MAX_POOL = 10000
+
+def _task_pools(tasks: list):
+    """All ordered 1..3-task picks, indexed by pick size; None if too large."""
+    n = len(tasks)
+    sizes = range(1, min(3, n) + 1)
+    if sum(math.perm(n, k) for k in sizes) > _MAX_POOL:
+        return None
+    return [None] + [list(itertools.permutations(tasks, k)) for k in sizes]
+
 def generate_all_reports(cfg: dict):
-    template    = cfg['template']
+    with open(cfg['template'], 'rb') as f:
+        template_bytes = f.read()
+    # parse once here so a broken template fails before any worker starts
+    PdfReader(io.BytesIO(template_bytes))
     full_name   = cfg['name']
     parts       = full_name.split()
     vorname     = parts[0]
@@ -134,53 +181,80 @@ def generate_all_reports(cfg: dict):
     start, end  = cfg['start_date'], cfg['end_date']
     default_hrs = cfg['default_hours']
     special     = cfg['special_days'].copy()
-    # add holidays
+    # add holidays (materialized once so the lazy HolidayBase is not probed later)
     yrs = range(start.year, end.year + 1)
-    de_h = holidays.Germany(years=list(yrs), language='de')
+    de_h = dict(holidays.Germany(years=list(yrs), language='de'))
     for d, label in de_h.items():
-        if start <= d <= end and d not in special:
-            special[d] = label
+        if start <= d <= end:
+            special.setdefault(d, label)
     # first Monday on or before start
-    first_mon = start + relativedelta(weekday=MO(-1))
-    cur = first_mon
-    weekdays = ['Montag','Dienstag','Mittwoch','Donnerstag','Freitag']
+    first_mon = start - datetime.timedelta(days=start.weekday())
+    # per-day lookup indexed by days since first_mon:
+    # None = regular workday, otherwise (entries, hours)
+    off_start = (start - first_mon).days
+    off_end   = (end - first_mon).days
+    day_info  = [None] * (off_end + 7)
+    for idx in range(off_start):
+        day_info[idx] = ((), 0)
+    for idx in range(off_end + 1, len(day_info)):
+        day_info[idx] = ((), 0)
+    for d, label in special.items():
+        idx = (d - first_mon).days
+        if off_start <= idx <= off_end:
+            hrs = default_hrs if label.lower() not in ('urlaub','krankheit') else 0
+            day_info[idx] = ((label,), hrs)
+    # all week starts and their training year, computed up front; if start
+    # falls on a weekend, the first week has no workday in range and is skipped
+    first_week   = 7 if off_start > 4 else 0
+    week_offsets = range(first_week, off_end + 1, 7)
+    year_nums    = [max(1, min(3, (off - off_start) // 365 + 1)) for off in week_offsets]
+    first_ord    = first_mon.toordinal()
+    # hours are fully determined by day_info: schedule them in one pass,
+    # leaving only the task picks for the weekly loop
+    day_hours   = [default_hrs if info is None else info[1] for info in day_info]
+    week_totals = [sum(day_hours[off:off + 5]) for off in week_offsets]
+    rng   = random.Random(cfg['seed'])
+    # per training year (index 1..3): form label, task list, task pools
+    aprons        = ['', '1. Ausbildungsjahr', '2. Ausbildungsjahr', '3. Ausbildungsjahr']
+    tasks_by_year = [None] + [cfg['tasks'][y] for y in (1, 2, 3)]
+    pools_by_year = [None] + [_task_pools(t) for t in tasks_by_year[1:]]
+    # fields shared by every week; each week copies and fills the rest
+    base_data = {'Vorname': vorname, 'Nachname': nachname}
     count = 0
-    while cur <= end:
-        count += 1
-        week_end = cur + datetime.timedelta(days=4)
-        year_num = (cur - start).days // 365 + 1
-        year_num = max(1, min(3, year_num))
-        data = {
-            'Vorname':                    vorname,
-            'Nachname':                   nachname,
-            'Ausbildungsjahr':            f"{year_num}. Ausbildungsjahr",
-            'Ausbildungsnachweis_Nummer': str(count),
-            'Datum_Start':                cur.strftime('%d.%m.%Y'),
-            'Datum_Ende':                 week_end.strftime('%d.%m.%Y')
-        }
-        total = 0
-        tasks = cfg['tasks'][year_num]
-        for i, day in enumerate(weekdays):
-            date = cur + datetime.timedelta(days=i)
-            if date < start or date > end:
-                entries, hrs = [], 0
-            elif date in special:
-                label = special[date]
-                entries = [label]
-                hrs = default_hrs if label.lower() not in ('urlaub','krankheit') else 0
-            else:
-                sample = random.sample(tasks, random.randint(1, min(3, len(tasks))))
-                entries = sample
-                hrs = default_hrs
-            total += hrs
-            for j in range(1, 4):
-                data[f"{day}_T{j}"] = entries[j-1] if j <= len(entries) else ''
-            data[f"{day}_Stunden"] = str(hrs)
-        data['Gesamtstunden'] = str(total)
-        filename_body = f"ausbildungsnachweis-{cur.strftime('%d')}-{week_end.strftime('%d-%m-%Y')}.pdf"
-        out_fn = f"{count:02d}_{filename_body}"
-        fill_week_form(template, out_fn, data)
-        cur += relativedelta(weeks=1)
+    futures = []
+    # weeks are independent: render and write them across all cores while
+    # the following weeks are still being scheduled here
+    with ProcessPoolExecutor(initializer=_init_worker, initargs=(template_bytes,)) as ex:
+        for base_idx, year_num, total in zip(week_offsets, year_nums, week_totals):
+            count += 1
+            cur      = datetime.date.fromordinal(first_ord + base_idx)
+            week_end = datetime.date.fromordinal(first_ord + base_idx + 4)
+            data = base_data.copy()
+            data['Ausbildungsjahr']            = aprons[year_num]
+            data['Ausbildungsnachweis_Nummer'] = str(count)
+            data['Datum_Start']                = cur.strftime('%d.%m.%Y')
+            data['Datum_Ende']                 = week_end.strftime('%d.%m.%Y')
+            tasks = tasks_by_year[year_num]
+            pool  = pools_by_year[year_num]
+            for i, (task_fields, hours_field) in enumerate(_DAY_FIELDS):
+                info = day_info[base_idx + i]
+                if info is not None:
+                    entries = info[0]
+                else:
+                    k = rng.randint(1, min(3, len(tasks)))
+                    if pool is not None:
+                        entries = pool[k][rng.randrange(len(pool[k]))]
+                    else:
+                        entries = rng.sample(tasks, k)
+                for j, field in enumerate(task_fields):
+                    data[field] = entries[j] if j < len(entries) else ''
+                data[hours_field] = str(day_hours[base_idx + i])
+            data['Gesamtstunden'] = str(total)
+            filename_body = f"ausbildungsnachweis-{cur.strftime('%d')}-{week_end.strftime('%d-%m-%Y')}.pdf"
+            out_fn = f"{count:02d}_{filename_body}"
+            futures.append(ex.submit(_render_one, (out_fn, data)))
+        for fut in futures:
+            fut.result()
     print(f"✅ {count} Berichte erstellt.")
 
 # -----------------------------------------------------------------------------